@@ -1,4 +1,4 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from typing import List
 import uuid
 from datetime import datetime
@@ -6,6 +6,11 @@ from pydantic import BaseModel
 from app.services.s3 import S3Service
 import logging
 
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
@@ -20,20 +25,87 @@ class PDF(BaseModel):
     url: str
 
 
-@router.post("/upload-pdf")
-async def upload_pdf(file: UploadFile = File(...)):
-    if not file.filename.endswith('.pdf'):
-        raise HTTPException(status_code=400, detail="File must be a PDF")
+async def _stream_pdf_to_s3(request: Request):
+    """Parse the multipart body as it arrives and stream the 'file' part to S3
+
+    The body is never spooled to disk or held in full, unlike UploadFile.
+    Returns the original filename and the presigned URL of the object.
+    """
+    content_type, params = parse_options_header(request.headers.get('content-type', ''))
+    if content_type != b'multipart/form-data' or b'boundary' not in params:
+        raise HTTPException(status_code=400, detail="Expected multipart/form-data")
+
+    # Parser callbacks are synchronous, so they queue events that are
+    # handled (and awaited) after each body chunk
+    events = []
+    header = {'field': b'', 'value': b''}
+    headers = {}
+
+    def on_header_field(data, start, end):
+        header['field'] += data[start:end]
+
+    def on_header_value(data, start, end):
+        header['value'] += data[start:end]
+
+    def on_header_end():
+        headers[header['field'].lower()] = header['value']
+        header['field'] = header['value'] = b''
+
+    def on_headers_finished():
+        events.append(('part', dict(headers)))
+        headers.clear()
 
+    parser = MultipartParser(params[b'boundary'], {
+        'on_header_field': on_header_field,
+        'on_header_value': on_header_value,
+        'on_header_end': on_header_end,
+        'on_headers_finished': on_headers_finished,
+        'on_part_data': lambda data, start, end: events.append(('data', data[start:end])),
+        'on_part_end': lambda: events.append(('end', None)),
+    })
+
+    filename = None
+    writer = None
+    current = None
+    try:
+        async for body_chunk in request.stream():
+            parser.write(body_chunk)
+            for kind, payload in events:
+                if kind == 'part':
+                    _, disposition = parse_options_header(payload.get(b'content-disposition', b''))
+                    if disposition.get(b'name') != b'file' or writer is not None:
+                        continue
+                    filename = disposition.get(b'filename', b'').decode()
+                    if not filename.endswith('.pdf'):
+                        raise HTTPException(status_code=400, detail="File must be a PDF")
+                    # Generate unique filename
+                    unique_filename = f"{uuid.uuid4()}_{filename}"
+                    writer = current = s3_service.open_upload(unique_filename)
+                elif kind == 'data' and current is not None:
+                    await current.write(payload)
+                elif kind == 'end':
+                    current = None
+            events.clear()
+        parser.finalize()
+
+        if writer is None:
+            raise HTTPException(status_code=400, detail="No file uploaded")
+        await writer.close()
+    except BaseException:
+        if writer is not None:
+            await writer.abort()
+        raise
+
+    return filename, s3_service.generate_presigned_url(writer.key)
+
+
+@router.post("/upload-pdf")
+async def upload_pdf(request: Request):
     try:
-        # Generate unique filename
-        unique_filename = f"{uuid.uuid4()}_{file.filename}"
-        print("Filename:", file.filename)
-        # Upload to S3
-        url = await s3_service.upload_file(file.file, unique_filename)
+        filename, url = await _stream_pdf_to_s3(request)
 
         return {
-            "filename": file.filename,
+            "filename": filename,
             "id": str(uuid.uuid4()),
             "url": url,
             "status": "uploaded"
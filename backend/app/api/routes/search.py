@@ -1,7 +1,9 @@
 # backend/app/api/routes/search.py
-from fastapi import APIRouter, HTTPException
-from typing import List, Optional
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Response
+from typing import List, Literal, Optional, Pattern
+from pydantic import BaseModel, Field
+import orjson
+import re
 from app.services.vector_store.qdrant import QdrantStore
 from app.services.pdf_processing.embedder import create_embedding_generator
 
@@ -11,32 +13,102 @@ router = APIRouter()
 class SearchQuery(BaseModel):
     query: str
     pdf_key: Optional[str] = None
+    # Search several PDFs at once; combined with pdf_key if both are given
+    pdf_keys: Optional[List[str]] = None
     limit: int = 5
+    # Cap results from any single PDF
+    max_per_document: Optional[int] = Field(default=None, gt=0)
+    # Maximal marginal relevance: 1.0 ranks purely by score, lower values
+    # favour results that differ from those already picked
+    mmr_lambda: Optional[float] = Field(default=None, ge=0, le=1)
+    # Payload fields to return; chunk_id and score are always included
+    fields: Optional[List[Literal["text", "pdf_key", "seq", "metadata"]]] = None
+    # Trim text to a window of this many characters around the first match
+    snippet_chars: Optional[int] = Field(default=None, gt=0)
+    # Add [start, end] offsets of query terms within the returned text
+    highlight: bool = False
+    # Attach the text of this many neighbouring chunks on each side
+    expand_neighbors: int = Field(default=0, ge=0, le=10)
 
 
 class SearchResult(BaseModel):
     chunk_id: str
-    text: str
-    pdf_key: str
-    metadata: dict
     score: float
+    text: Optional[str] = None
+    pdf_key: Optional[str] = None
+    seq: Optional[int] = None
+    metadata: Optional[dict] = None
+    context: Optional[dict] = None
+    highlights: Optional[List[List[int]]] = None
+
+
+def _terms_pattern(query: str) -> Optional[Pattern]:
+    terms = {term for term in re.findall(r"\w+", query.lower()) if len(term) > 2}
+    if not terms:
+        return None
+    # Longest first so overlapping terms match the fuller word
+    return re.compile("|".join(map(re.escape, sorted(terms, key=len, reverse=True))),
+                      re.IGNORECASE)
+
+
+def _snippet(text: str, pattern: Optional[Pattern], max_chars: int) -> str:
+    """Cut text to max_chars, starting a little before the first match"""
+    if len(text) <= max_chars:
+        return text
+    match = pattern.search(text) if pattern else None
+    center = match.start() if match else 0
+    start = max(0, min(center - max_chars // 4, len(text) - max_chars))
+    end = start + max_chars
+    return ("…" if start > 0 else "") + text[start:end] + ("…" if end < len(text) else "")
 
 
 @router.post("/search", response_model=List[SearchResult])
 async def search_pdfs(query: SearchQuery):
     try:
-        # Generate embedding for query
-        embedder = create_embedding_generator()
+        # Embed the query with the model of the active collection
+        vector_store = QdrantStore()
+        embedder = create_embedding_generator(vector_store.model_name)
         query_embedding = await embedder.generate_query_embedding(query.query)
 
+        fields = query.fields
+        # Payload keys fetched only for the neighbour lookup, not returned
+        lookup_keys = []
+        if query.expand_neighbors and fields is not None:
+            # Neighbour lookup needs each hit's position
+            lookup_keys = [key for key in ("pdf_key", "seq") if key not in fields]
+            fields = [*fields, *lookup_keys]
+
         # Search in vector store
-        vector_store = QdrantStore()
         results = await vector_store.search(
             query_vector=query_embedding,
             pdf_key=query.pdf_key,
-            limit=query.limit
+            limit=query.limit,
+            fields=fields,
+            pdf_keys=query.pdf_keys,
+            max_per_document=query.max_per_document,
+            mmr_lambda=query.mmr_lambda
         )
 
-        return results
+        if query.expand_neighbors:
+            await vector_store.attach_neighbor_context(results, query.expand_neighbors)
+            for result in results:
+                for key in lookup_keys:
+                    result.pop(key, None)
+
+        if query.snippet_chars or query.highlight:
+            pattern = _terms_pattern(query.query)
+            for result in results:
+                if "text" not in result:
+                    continue
+                if query.snippet_chars:
+                    result["text"] = _snippet(result["text"], pattern, query.snippet_chars)
+                if query.highlight:
+                    result["highlights"] = [
+                        [m.start(), m.end()] for m in pattern.finditer(result["text"])
+                    ] if pattern else []
+
+        # Results are built from trusted store payloads, so skip re-validating
+        # them through SearchResult and serialise directly with orjson
+        return Response(content=orjson.dumps(results), media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
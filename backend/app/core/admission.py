@@ -0,0 +1,201 @@
+# backend/app/core/admission.py
+"""Admission control and load shedding for expensive endpoints.
+
+Requests to limited endpoints take a slot from a shared pool before they
+run. Each traffic class has its own concurrency limit, a bounded wait
+queue and a queue-time budget. Freed slots go to interactive requests
+before ingestion. Requests that cannot be queued are rejected with 429.
+Requests that wait past the budget get 503. Both carry a Retry-After
+header, so overload is answered quickly instead of piling up behind the
+model and Qdrant.
+"""
+import asyncio
+import json
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional
+from app.core.config import settings
+
+
+@dataclass
+class TrafficClass:
+    name: str
+    priority: int  # lower is served first
+    max_concurrency: int
+    max_queue: int
+    max_wait: float  # seconds
+    in_flight: int = 0
+    waiters: Deque[asyncio.Future] = field(default_factory=deque)
+    # Moving average of service time, used for Retry-After
+    avg_service_time: float = 0.1
+    admitted_total: int = 0
+    rejected_total: Dict[str, int] = field(
+        default_factory=lambda: {"queue_full": 0, "queue_timeout": 0})
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    def __init__(self, capacity: int, classes: List[TrafficClass]):
+        self.capacity = capacity
+        self.classes = {c.name: c for c in classes}
+        self.by_priority = sorted(classes, key=lambda c: c.priority)
+        self.in_flight = 0
+
+    def _can_start(self, traffic: TrafficClass) -> bool:
+        return (self.in_flight < self.capacity
+                and traffic.in_flight < traffic.max_concurrency)
+
+    def _start(self, traffic: TrafficClass):
+        self.in_flight += 1
+        traffic.in_flight += 1
+        traffic.admitted_total += 1
+
+    def _retry_after(self, traffic: TrafficClass) -> int:
+        backlog = len(traffic.waiters) + traffic.in_flight
+        return max(1, math.ceil(backlog * traffic.avg_service_time / traffic.max_concurrency))
+
+    def _reject(self, traffic: TrafficClass, status_code: int, reason: str):
+        traffic.rejected_total[reason] += 1
+        raise AdmissionRejected(status_code, reason, self._retry_after(traffic))
+
+    async def acquire(self, name: str):
+        """Wait for a slot, or raise AdmissionRejected"""
+        traffic = self.classes[name]
+        # _wake starts every waiter that can run, so anyone still queued is
+        # blocked and a request that can start now is not jumping the queue
+        if self._can_start(traffic):
+            self._start(traffic)
+            return
+
+        if len(traffic.waiters) >= traffic.max_queue:
+            self._reject(traffic, 429, "queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        traffic.waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, traffic.max_wait)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot granted just as the budget ran out
+                return
+            self._discard(traffic, waiter)
+            self._reject(traffic, 503, "queue_timeout")
+        except BaseException:
+            # Client went away: give the slot back if it was already granted
+            self._discard(traffic, waiter)
+            if waiter.done() and not waiter.cancelled():
+                self.release(name)
+            raise
+
+    def _discard(self, traffic: TrafficClass, waiter: asyncio.Future):
+        try:
+            traffic.waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self, name: str, service_time: Optional[float] = None):
+        traffic = self.classes[name]
+        self.in_flight -= 1
+        traffic.in_flight -= 1
+        if service_time is not None:
+            traffic.avg_service_time += 0.1 * (service_time - traffic.avg_service_time)
+        self._wake()
+
+    def _wake(self):
+        """Hand free slots to waiters, most important class first"""
+        for traffic in self.by_priority:
+            while traffic.waiters and self._can_start(traffic):
+                waiter = traffic.waiters.popleft()
+                if waiter.done():
+                    continue
+                self._start(traffic)
+                waiter.set_result(None)
+
+    def metrics(self) -> str:
+        """Queue depths and counters in Prometheus text format"""
+        lines = [
+            "# TYPE admission_queue_depth gauge",
+            *(f'admission_queue_depth{{class="{c.name}"}} {len(c.waiters)}'
+              for c in self.by_priority),
+            "# TYPE admission_in_flight gauge",
+            *(f'admission_in_flight{{class="{c.name}"}} {c.in_flight}'
+              for c in self.by_priority),
+            "# TYPE admission_admitted_total counter",
+            *(f'admission_admitted_total{{class="{c.name}"}} {c.admitted_total}'
+              for c in self.by_priority),
+            "# TYPE admission_rejected_total counter",
+            *(f'admission_rejected_total{{class="{c.name}",reason="{reason}"}} {count}'
+              for c in self.by_priority for reason, count in c.rejected_total.items()),
+        ]
+        return "\n".join(lines) + "\n"
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying an AdmissionController to selected paths"""
+
+    def __init__(self, app, controller: AdmissionController, routes: Dict[str, str]):
+        self.app = app
+        self.controller = controller
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send):
+        name = self.routes.get(scope["path"]) if scope["type"] == "http" else None
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.controller.acquire(name)
+        except AdmissionRejected as e:
+            await self._send_rejection(send, e)
+            return
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(name, time.monotonic() - started)
+
+    async def _send_rejection(self, send, rejection: AdmissionRejected):
+        body = json.dumps({"detail": f"Server busy ({rejection.reason}), retry later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": rejection.status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(rejection.retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def create_admission_controller() -> AdmissionController:
+    return AdmissionController(
+        capacity=settings.ADMISSION_CAPACITY,
+        classes=[
+            TrafficClass(
+                name="search",
+                priority=0,
+                max_concurrency=settings.SEARCH_MAX_CONCURRENCY,
+                max_queue=settings.SEARCH_MAX_QUEUE,
+                max_wait=settings.SEARCH_MAX_WAIT_MS / 1000
+            ),
+            TrafficClass(
+                name="ingest",
+                priority=1,
+                max_concurrency=settings.INGEST_MAX_CONCURRENCY,
+                max_queue=settings.INGEST_MAX_QUEUE,
+                max_wait=settings.INGEST_MAX_WAIT_MS / 1000
+            ),
+        ]
+    )
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from pathlib import Path
+from typing import Optional
 
 
 class Settings(BaseSettings):
@@ -12,11 +13,43 @@ class Settings(BaseSettings):
     AWS_SECRET_KEY: str
     AWS_BUCKET_NAME: str
     AWS_REGION: str
+    # Custom endpoint for S3-compatible stores (MinIO, local stand-ins)
+    S3_ENDPOINT_URL: Optional[str] = None
+    # Multipart transfers: part size and parts in flight per object
+    S3_PART_SIZE_MB: int = 8
+    S3_MAX_CONCURRENCY: int = 8
 
     # Model configs
     EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
     CHUNK_SIZE: int = 1000
     CHUNK_OVERLAP: int = 200
+    # Parsed PDF elements, keyed by content hash and extractor settings
+    EXTRACTION_CACHE_DIR: str = "data/extraction_cache"
+    # Padded tokens per embedding batch; batch size adapts to chunk length
+    EMBEDDING_BATCH_TOKENS: int = 16384
+    # Unix socket of the shared embedding server; unset loads the model in-process
+    EMBEDDING_SERVER_SOCKET: Optional[str] = None
+
+    # OpenAI embeddings (base URL can point at a local stand-in server)
+    USE_OPENAI_EMBEDDINGS: bool = False
+    OPENAI_API_KEY: str = ""
+    OPENAI_BASE_URL: Optional[str] = None
+    OPENAI_EMBEDDING_MODEL: str = "text-embedding-ada-002"
+    OPENAI_MAX_CONCURRENCY: int = 4
+    OPENAI_RPM_LIMIT: int = 3000
+    OPENAI_TPM_LIMIT: int = 1_000_000
+    OPENAI_BATCH_TOKENS: int = 8192
+    OPENAI_MAX_RETRIES: int = 6
+
+    # Admission control: slots shared by all limited endpoints, then
+    # per-class concurrency, wait-queue length and queue-time budget
+    ADMISSION_CAPACITY: int = 16
+    SEARCH_MAX_CONCURRENCY: int = 16
+    SEARCH_MAX_QUEUE: int = 64
+    SEARCH_MAX_WAIT_MS: int = 500
+    INGEST_MAX_CONCURRENCY: int = 4
+    INGEST_MAX_QUEUE: int = 16
+    INGEST_MAX_WAIT_MS: int = 5000
 
     QDRANT_URL: str = "http://localhost:6333"
     QDRANT_API_KEY: str
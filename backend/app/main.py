@@ -1,11 +1,24 @@
 # backend/app/main.py
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
-from app.api.routes import pdf
+from app.api.routes import pdf, search
+from app.core.admission import AdmissionMiddleware, create_admission_controller
 from pathlib import Path
 
 app = FastAPI()
+admission = create_admission_controller()
+
+# Admission control: bounded queues, /search served before ingestion
+app.add_middleware(
+    AdmissionMiddleware,
+    controller=admission,
+    routes={
+        "/api/v1/search": "search",
+        "/api/v1/upload-pdf": "ingest",
+    }
+)
 
 # CORS middleware
 app.add_middleware(
@@ -23,8 +36,14 @@ app.mount("/uploads", StaticFiles(directory="data/uploads"), name="uploads")
 
 # Include routes
 app.include_router(pdf.router, prefix="/api/v1")
+app.include_router(search.router, prefix="/api/v1")
 
 
 @app.get("/")
 def read_root():
     return {"message": "PDF Chat API is running"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return admission.metrics()
@@ -1,10 +1,14 @@
 # backend/app/services/pdf_processing/embedder.py
-from typing import List, Dict, Any, Union
+from typing import List, Dict, Any, Optional, Union
+from functools import lru_cache
 from sentence_transformers import SentenceTransformer
 import numpy as np
 from app.core.config import settings
 import torch
+import asyncio
 import logging
+import random
+import time
 from dataclasses import dataclass
 from .chunker import Chunk
 
@@ -24,47 +28,97 @@ class EmbeddingGenerator:
     def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
         """Initialize the embedding generator"""
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.model_name = model_name
         try:
             self.model = SentenceTransformer(model_name, device=self.device)
             self.dimension = self.model.get_sentence_embedding_dimension()
+            self.max_seq_length = self.model.max_seq_length
             logger.info(f"Loaded embedding model {
                         model_name} on {self.device}")
         except Exception as e:
             logger.error(f"Failed to load embedding model: {str(e)}")
             raise
 
-    async def generate_embeddings(self, chunks: List[Chunk], batch_size: int = 32) -> List[EmbeddedChunk]:
-        """Generate embeddings for chunks in batches"""
-        try:
-            embedded_chunks = []
+    def _estimate_tokens(self, text: str) -> int:
+        """Estimate tokens the model will see for text"""
+        # Same heuristic as the chunker (1 token ≈ 4 characters), capped
+        # because the model truncates anything past max_seq_length
+        return min(max(len(text) // 4, 1), self.max_seq_length)
 
-            # Process chunks in batches
-            for i in range(0, len(chunks), batch_size):
-                batch = chunks[i:i + batch_size]
-                texts = [chunk.text for chunk in batch]
-
-                # Generate embeddings for batch
-                embeddings = self.model.encode(
-                    texts,
-                    show_progress_bar=False,
-                    convert_to_numpy=True,
-                    normalize_embeddings=True  # L2 normalization
-                )
+    def _plan_batches(self,
+                      texts: List[str],
+                      max_batch_tokens: int,
+                      max_batch_size: int) -> List[np.ndarray]:
+        """Group texts of similar length into batches under a token budget"""
+        lengths = np.array([self._estimate_tokens(text) for text in texts])
+        # Longest first, so the first text of each batch sets its padded width
+        order = np.argsort(-lengths, kind="stable")
 
-                # Create EmbeddedChunk objects
-                for chunk, embedding in zip(batch, embeddings):
-                    embedded_chunks.append(
-                        EmbeddedChunk(
-                            chunk_id=chunk.chunk_id,
-                            text=chunk.text,
-                            embedding=embedding,
-                            metadata={
-                                **chunk.metadata,
-                                "embedding_model": self.model.get_model_name(),
-                                "embedding_dimension": self.dimension
-                            }
-                        )
+        batches = []
+        start = 0
+        while start < len(order):
+            width = int(lengths[order[start]])
+            size = max(1, min(max_batch_size, max_batch_tokens // width))
+            batches.append(order[start:start + size])
+            start += size
+
+        return batches
+
+    def encode_texts(self,
+                     texts: List[str],
+                     batch_size: int = 128,
+                     max_batch_tokens: Optional[int] = None,
+                     out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Encode texts in length-bucketed batches, preserving input order
+
+        Texts are sorted by length so short headings are not padded to the
+        longest paragraph, and each batch holds as many texts as fit in
+        max_batch_tokens (padded), up to batch_size. Rows are written into
+        out when given, e.g. a shared-memory buffer.
+        """
+        max_batch_tokens = max_batch_tokens or settings.EMBEDDING_BATCH_TOKENS
+        if out is None:
+            out = np.empty((len(texts), self.dimension), dtype=np.float32)
+
+        for batch in self._plan_batches(texts, max_batch_tokens, batch_size):
+            # Generate embeddings for batch and scatter back to original order
+            out[batch] = self.model.encode(
+                [texts[i] for i in batch],
+                batch_size=len(batch),
+                show_progress_bar=False,
+                convert_to_numpy=True,
+                normalize_embeddings=True  # L2 normalization
+            )
+
+        return out
+
+    async def generate_embeddings(self,
+                                  chunks: List[Chunk],
+                                  batch_size: int = 128,
+                                  max_batch_tokens: Optional[int] = None) -> List[EmbeddedChunk]:
+        """Generate embeddings for chunks in length-bucketed batches"""
+        try:
+            embeddings = self.encode_texts(
+                [chunk.text for chunk in chunks],
+                batch_size=batch_size,
+                max_batch_tokens=max_batch_tokens
+            )
+
+            # Create EmbeddedChunk objects
+            embedded_chunks = []
+            for chunk, embedding in zip(chunks, embeddings):
+                embedded_chunks.append(
+                    EmbeddedChunk(
+                        chunk_id=chunk.chunk_id,
+                        text=chunk.text,
+                        embedding=embedding,
+                        metadata={
+                            **chunk.metadata,
+                            "embedding_model": self.model_name,
+                            "embedding_dimension": self.dimension
+                        }
                     )
+                )
 
             return embedded_chunks
 
@@ -85,41 +139,172 @@ class EmbeddingGenerator:
             raise
 
 
+class _RateBudget:
+    """Per-minute budget (requests or tokens) shared by concurrent calls"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = per_minute
+        self.available = float(per_minute)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self, amount: int):
+        """Wait until amount can be spent, refilling continuously"""
+        amount = min(amount, self.capacity)
+        # Holding the lock while sleeping keeps waiters in FIFO order
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.available = min(
+                    self.capacity,
+                    self.available + (now - self.updated) * self.capacity / 60
+                )
+                self.updated = now
+                if self.available >= amount:
+                    self.available -= amount
+                    return
+                await asyncio.sleep((amount - self.available) * 60 / self.capacity)
+
+
 class OpenAIEmbeddingGenerator:
-    """OpenAI embedding generator for production use"""
+    """OpenAI embedding generator for production use
 
-    def __init__(self, api_key: str):
-        self.api_key = api_key
-        self.dimension = 1536  # OpenAI ada-002 dimension
+    Batches are sized by token count and sent concurrently (bounded by
+    max_concurrency) within the account's requests- and tokens-per-minute
+    limits. Rate limits, timeouts and 5xx responses are retried with
+    exponential backoff and full jitter.
+    """
 
-    async def generate_embeddings(self, chunks: List[Chunk], batch_size: int = 32) -> List[EmbeddedChunk]:
-        """Generate embeddings using OpenAI API"""
-        try:
-            import openai
-            openai.api_key = self.api_key
+    # OpenAI rejects requests with more inputs than this
+    MAX_INPUTS_PER_REQUEST = 2048
+    DIMENSIONS = {"text-embedding-3-large": 3072}
 
-            embedded_chunks = []
+    def __init__(self,
+                 api_key: str,
+                 model: str = "text-embedding-ada-002",
+                 base_url: Optional[str] = None,
+                 max_concurrency: int = 4,
+                 requests_per_minute: int = 3000,
+                 tokens_per_minute: int = 1_000_000,
+                 max_batch_tokens: int = 8192,
+                 max_retries: int = 6,
+                 timeout: float = 30.0):
+        import httpx
+        from openai import AsyncOpenAI
 
-            for i in range(0, len(chunks), batch_size):
-                batch = chunks[i:i + batch_size]
-                texts = [chunk.text for chunk in batch]
+        self.model = model
+        self.model_name = model
+        self.dimension = self.DIMENSIONS.get(model, 1536)  # ada-002 / 3-small
+        self.max_batch_tokens = max_batch_tokens
+        self.max_retries = max_retries
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.request_budget = _RateBudget(requests_per_minute)
+        self.token_budget = _RateBudget(tokens_per_minute)
 
-                response = await openai.Embedding.acreate(
-                    input=texts,
-                    model="text-embedding-ada-002"
+        # One pooled keep-alive client; retries are handled here instead
+        self.client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            max_retries=0,
+            timeout=timeout,
+            http_client=httpx.AsyncClient(
+                timeout=timeout,
+                limits=httpx.Limits(
+                    max_connections=max_concurrency,
+                    max_keepalive_connections=max_concurrency
                 )
+            )
+        )
+
+    def _estimate_tokens(self, text: str) -> int:
+        """Estimate number of tokens in text"""
+        # Rough estimation: 1 token ≈ 4 characters
+        return max(len(text) // 4, 1)
+
+    def _plan_batches(self, texts: List[str]) -> List[range]:
+        """Split texts, in order, into batches under the token budget"""
+        batches = []
+        start = 0
+        batch_tokens = 0
+        for i, text in enumerate(texts):
+            tokens = self._estimate_tokens(text)
+            if i > start and (batch_tokens + tokens > self.max_batch_tokens
+                              or i - start >= self.MAX_INPUTS_PER_REQUEST):
+                batches.append(range(start, i))
+                start = i
+                batch_tokens = 0
+            batch_tokens += tokens
+        if start < len(texts):
+            batches.append(range(start, len(texts)))
+        return batches
+
+    def _retry_delay(self, attempt: int, error: Exception) -> float:
+        """Backoff delay, honouring the server's Retry-After when present"""
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        try:
+            if retry_after is not None:
+                return float(retry_after) + random.uniform(0, 0.5)
+        except ValueError:
+            pass
+        return random.uniform(0, min(60.0, 0.5 * 2 ** attempt))
+
+    async def _embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed one batch, retrying transient failures"""
+        import openai
+
+        tokens = sum(self._estimate_tokens(text) for text in texts)
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self.semaphore:
+                    # Charge the budgets only once a slot is free, so the
+                    # charge lines up with the send and queued batches
+                    # cannot burst past the per-minute limits
+                    await self.request_budget.acquire(1)
+                    await self.token_budget.acquire(tokens)
+                    response = await self.client.embeddings.create(
+                        input=texts,
+                        model=self.model
+                    )
+                return [item.embedding for item in response.data]
+            except (openai.RateLimitError,
+                    openai.APITimeoutError,
+                    openai.APIConnectionError,
+                    openai.InternalServerError) as e:
+                if attempt == self.max_retries:
+                    raise
+                # Back off outside the semaphore so other batches can send
+                delay = self._retry_delay(attempt, e)
+                logger.warning(f"OpenAI embedding request failed ({type(e).__name__}), "
+                               f"retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
 
-                embeddings = [item['embedding'] for item in response['data']]
+    async def generate_embeddings(self, chunks: List[Chunk], batch_size: int = 32) -> List[EmbeddedChunk]:
+        """Generate embeddings using OpenAI API
+
+        batch_size is accepted for interface compatibility; batches are
+        sized by max_batch_tokens instead.
+        """
+        try:
+            texts = [chunk.text for chunk in chunks]
+            batches = self._plan_batches(texts)
+
+            results = await asyncio.gather(*(
+                self._embed(texts[batch.start:batch.stop]) for batch in batches
+            ))
 
-                for chunk, embedding in zip(batch, embeddings):
+            embedded_chunks = []
+            for batch, embeddings in zip(batches, results):
+                for i, embedding in zip(batch, embeddings):
+                    chunk = chunks[i]
                     embedded_chunks.append(
                         EmbeddedChunk(
                             chunk_id=chunk.chunk_id,
                             text=chunk.text,
-                            embedding=np.array(embedding),
+                            embedding=np.array(embedding, dtype=np.float32),
                             metadata={
                                 **chunk.metadata,
-                                "embedding_model": "text-embedding-ada-002",
+                                "embedding_model": self.model,
                                 "embedding_dimension": self.dimension
                             }
                         )
@@ -131,11 +316,49 @@ class OpenAIEmbeddingGenerator:
             logger.error(f"Error generating OpenAI embeddings: {str(e)}")
             raise
 
+    async def generate_query_embedding(self, query: str) -> np.ndarray:
+        """Generate embedding for a search query"""
+        try:
+            embeddings = await self._embed([query])
+            return np.array(embeddings[0], dtype=np.float32)
+        except Exception as e:
+            logger.error(f"Error generating OpenAI query embedding: {str(e)}")
+            raise
+
 # Factory for creating embedding generator based on settings
 
 
-def create_embedding_generator() -> Union[EmbeddingGenerator, OpenAIEmbeddingGenerator]:
-    """Create appropriate embedding generator based on settings"""
+def create_embedding_generator(
+    model_name: Optional[str] = None
+) -> Union[EmbeddingGenerator, OpenAIEmbeddingGenerator]:
+    """Create appropriate embedding generator based on settings
+
+    model_name overrides the configured model, e.g. to match the active
+    vector store collection or the target of a migration. Generators are
+    cached so the model (or HTTP connection pool) is shared across requests
+    instead of being rebuilt on every call.
+    """
+    if model_name is None:
+        model_name = (settings.OPENAI_EMBEDDING_MODEL if settings.USE_OPENAI_EMBEDDINGS
+                      else settings.EMBEDDING_MODEL)
+    return _cached_embedding_generator(model_name)
+
+
+@lru_cache(maxsize=None)
+def _cached_embedding_generator(model_name: str):
     if settings.USE_OPENAI_EMBEDDINGS:
-        return OpenAIEmbeddingGenerator(settings.OPENAI_API_KEY)
-    return EmbeddingGenerator(settings.EMBEDDING_MODEL)
+        return OpenAIEmbeddingGenerator(
+            settings.OPENAI_API_KEY,
+            model=model_name,
+            base_url=settings.OPENAI_BASE_URL,
+            max_concurrency=settings.OPENAI_MAX_CONCURRENCY,
+            requests_per_minute=settings.OPENAI_RPM_LIMIT,
+            tokens_per_minute=settings.OPENAI_TPM_LIMIT,
+            max_batch_tokens=settings.OPENAI_BATCH_TOKENS,
+            max_retries=settings.OPENAI_MAX_RETRIES
+        )
+    if settings.EMBEDDING_SERVER_SOCKET and model_name == settings.EMBEDDING_MODEL:
+        # Shared per-host model process; see embedding_server.py
+        from .embedding_server import EmbeddingClient
+        return EmbeddingClient(settings.EMBEDDING_SERVER_SOCKET, model_name)
+    return EmbeddingGenerator(model_name)
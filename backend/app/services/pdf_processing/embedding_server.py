@@ -0,0 +1,325 @@
+# backend/app/services/pdf_processing/embedding_server.py
+"""Host-wide embedding server shared by all uvicorn workers.
+
+One process loads the SentenceTransformer model and serves embedding
+requests over a Unix socket, merging concurrent requests from every worker
+into shared batches. Vectors are not sent over the socket: the client
+creates a shared-memory segment, the server writes the embeddings straight
+into it, and the client reads them back as a zero-copy NumPy view.
+
+Run one per host:
+    python -m app.services.pdf_processing.embedding_server --socket /run/pdfchat/embed.sock
+and set EMBEDDING_SERVER_SOCKET to the same path for the API workers.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import mmap
+import os
+import socket
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+import numpy as np
+
+from app.core.config import settings
+from .chunker import Chunk
+from .embedder import EmbeddedChunk, EmbeddingGenerator
+
+logger = logging.getLogger(__name__)
+
+SHM_DIR = Path("/dev/shm")
+SHM_PREFIX = "pdfchat-emb-"
+_HEADER = struct.Struct("!I")
+
+
+def _map_shm(name: str, nbytes: int, create: bool = False) -> mmap.mmap:
+    """Map a shared-memory segment, creating it when asked"""
+    if "/" in name or not name.startswith(SHM_PREFIX):
+        raise ValueError(f"Invalid shared memory name: {name}")
+    flags = os.O_RDWR | (os.O_CREAT | os.O_EXCL if create else 0)
+    fd = os.open(SHM_DIR / name, flags, 0o600)
+    try:
+        if create:
+            os.ftruncate(fd, nbytes)
+        return mmap.mmap(fd, nbytes)
+    finally:
+        os.close(fd)
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> Dict[str, Any]:
+    (length,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    return json.loads(await reader.readexactly(length))
+
+
+async def _write_frame(writer: asyncio.StreamWriter, message: Dict[str, Any]):
+    raw = json.dumps(message).encode()
+    writer.write(_HEADER.pack(len(raw)) + raw)
+    await writer.drain()
+
+
+@dataclass
+class _EmbedRequest:
+    texts: List[str]
+    shm: str
+    future: asyncio.Future = field(repr=False)
+
+
+class EmbeddingServer:
+    def __init__(self,
+                 generator: EmbeddingGenerator,
+                 max_batch_texts: int = 512,
+                 max_wait: float = 0.005):
+        self.generator = generator
+        self.max_batch_texts = max_batch_texts
+        self.max_wait = max_wait
+        self.queue: asyncio.Queue = asyncio.Queue()
+        # A single thread owns the model; torch parallelises inside encode
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    async def serve_forever(self, socket_path: str):
+        """Listen on socket_path and batch requests until cancelled"""
+        Path(socket_path).unlink(missing_ok=True)
+        server = await asyncio.start_unix_server(self._handle_connection, path=socket_path)
+        batcher = asyncio.create_task(self._batch_loop())
+        logger.info(f"Embedding server for {self.generator.model_name} listening on {socket_path}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+            self.executor.shutdown(wait=False)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    message = await _read_frame(reader)
+                except asyncio.IncompleteReadError:
+                    break
+
+                try:
+                    if message["op"] == "info":
+                        response = {
+                            "model": self.generator.model_name,
+                            "dimension": self.generator.dimension
+                        }
+                    elif message["op"] == "embed":
+                        future = asyncio.get_running_loop().create_future()
+                        await self.queue.put(_EmbedRequest(message["texts"], message["shm"], future))
+                        await future
+                        response = {"count": len(message["texts"])}
+                    else:
+                        response = {"error": f"Unknown op: {message['op']}"}
+                except Exception as e:
+                    logger.error(f"Embedding request failed: {str(e)}")
+                    response = {"error": str(e)}
+
+                await _write_frame(writer, response)
+        finally:
+            writer.close()
+
+    async def _batch_loop(self):
+        """Merge queued requests from all workers into shared batches"""
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self.queue.get()]
+            total = len(pending[0].texts)
+            deadline = loop.time() + self.max_wait
+
+            while total < self.max_batch_texts:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    request = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(request)
+                total += len(request.texts)
+
+            try:
+                errors = await loop.run_in_executor(self.executor, self._encode_into, pending)
+            except Exception as e:
+                errors = [e] * len(pending)
+
+            for request, error in zip(pending, errors):
+                if request.future.done():
+                    continue
+                if error is None:
+                    request.future.set_result(None)
+                else:
+                    request.future.set_exception(error)
+
+    def _encode_into(self, requests: List[_EmbedRequest]) -> List[Optional[Exception]]:
+        """Encode a merged batch and write each request's rows to its segment
+
+        Returns one entry per request: None on success, or the error that
+        kept its segment from being mapped. A client that gave up has
+        already unlinked its segment, which fails only that request.
+        """
+        dimension = self.generator.dimension
+        errors: List[Optional[Exception]] = [None] * len(requests)
+        segments = []
+        mapped = []
+        view = None
+        try:
+            for i, request in enumerate(requests):
+                try:
+                    segments.append(_map_shm(request.shm, len(request.texts) * dimension * 4))
+                    mapped.append(request)
+                except (OSError, ValueError) as e:
+                    errors[i] = e
+
+            if len(mapped) == 1:
+                view = np.frombuffer(segments[0], dtype=np.float32).reshape(-1, dimension)
+                self.generator.encode_texts(mapped[0].texts, out=view)
+            elif mapped:
+                texts = [text for request in mapped for text in request.texts]
+                embeddings = self.generator.encode_texts(texts)
+                start = 0
+                for segment, request in zip(segments, mapped):
+                    view = np.frombuffer(segment, dtype=np.float32).reshape(-1, dimension)
+                    view[:] = embeddings[start:start + len(request.texts)]
+                    start += len(request.texts)
+        finally:
+            # Release the last view so the mappings can be closed
+            view = None
+            for segment in segments:
+                try:
+                    segment.close()
+                except BufferError:
+                    # Still referenced by a failed encode's traceback; GC frees it
+                    pass
+
+        return errors
+
+
+class EmbeddingClient:
+    """Embedding generator backed by the host's shared embedding server"""
+
+    def __init__(self, socket_path: str, model_name: str):
+        # No I/O here: clients are created inside request handlers, so the
+        # server is first contacted (asynchronously) on the first embed
+        self.socket_path = socket_path
+        self.model_name = model_name
+        self._dimension: Optional[int] = None
+
+    @property
+    def dimension(self) -> int:
+        """Embedding dimension, fetched with a blocking call if still unknown
+
+        Only needed synchronously when a new collection is created; embed
+        calls fill it in without blocking the event loop.
+        """
+        if self._dimension is None:
+            self._set_info(self._info())
+        return self._dimension
+
+    def _set_info(self, info: Dict[str, Any]):
+        if info["model"] != self.model_name:
+            raise RuntimeError(f"Embedding server serves {info['model']}, "
+                               f"expected {self.model_name}")
+        self._dimension = info["dimension"]
+
+    def _info(self) -> Dict[str, Any]:
+        """Fetch model name and dimension (blocking)"""
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(self.socket_path)
+            raw = json.dumps({"op": "info"}).encode()
+            sock.sendall(_HEADER.pack(len(raw)) + raw)
+            with sock.makefile("rb") as stream:
+                (length,) = _HEADER.unpack(stream.read(_HEADER.size))
+                return json.loads(stream.read(length))
+
+    async def _request(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        reader, writer = await asyncio.open_unix_connection(self.socket_path)
+        try:
+            await _write_frame(writer, message)
+            response = await _read_frame(reader)
+        finally:
+            writer.close()
+            await writer.wait_closed()
+        if "error" in response:
+            raise RuntimeError(f"Embedding server error: {response['error']}")
+        return response
+
+    async def embed_texts(self, texts: List[str]) -> np.ndarray:
+        """Embed texts on the server, returning a view over shared memory
+
+        Unlike EmbeddingGenerator.encode_texts this is a coroutine, and
+        batching is left to the server.
+        """
+        if self._dimension is None:
+            self._set_info(await self._request({"op": "info"}))
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+
+        name = f"{SHM_PREFIX}{os.getpid()}-{uuid4().hex}"
+        segment = _map_shm(name, len(texts) * self.dimension * 4, create=True)
+        try:
+            await self._request({"op": "embed", "texts": texts, "shm": name})
+        finally:
+            # The mapping outlives the name, so nothing is left in /dev/shm
+            os.unlink(SHM_DIR / name)
+
+        # Released once the last array referencing the mapping is gone
+        return np.frombuffer(segment, dtype=np.float32).reshape(len(texts), self.dimension)
+
+    async def generate_embeddings(self, chunks: List[Chunk], batch_size: int = 128) -> List[EmbeddedChunk]:
+        """Generate embeddings for chunks via the embedding server"""
+        try:
+            embeddings = await self.embed_texts([chunk.text for chunk in chunks])
+
+            return [
+                EmbeddedChunk(
+                    chunk_id=chunk.chunk_id,
+                    text=chunk.text,
+                    embedding=embedding,
+                    metadata={
+                        **chunk.metadata,
+                        "embedding_model": self.model_name,
+                        "embedding_dimension": self.dimension
+                    }
+                )
+                for chunk, embedding in zip(chunks, embeddings)
+            ]
+
+        except Exception as e:
+            logger.error(f"Error generating embeddings via server: {str(e)}")
+            raise
+
+    async def generate_query_embedding(self, query: str) -> np.ndarray:
+        """Generate embedding for a search query"""
+        try:
+            return (await self.embed_texts([query]))[0]
+        except Exception as e:
+            logger.error(f"Error generating query embedding via server: {str(e)}")
+            raise
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared embedding server")
+    parser.add_argument("--socket", default=settings.EMBEDDING_SERVER_SOCKET,
+                        required=settings.EMBEDDING_SERVER_SOCKET is None)
+    parser.add_argument("--model", default=settings.EMBEDDING_MODEL)
+    parser.add_argument("--max-batch-texts", type=int, default=512)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = EmbeddingServer(
+        EmbeddingGenerator(args.model),
+        max_batch_texts=args.max_batch_texts,
+        max_wait=args.max_wait_ms / 1000
+    )
+    asyncio.run(server.serve_forever(args.socket))
+
+
+if __name__ == "__main__":
+    main()
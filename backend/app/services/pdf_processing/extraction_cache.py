@@ -0,0 +1,92 @@
+# backend/app/services/pdf_processing/extraction_cache.py
+from typing import List, Dict, Any, Optional
+from pathlib import Path
+import hashlib
+import logging
+import os
+import msgpack
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionCache:
+    """On-disk cache of extracted PDF elements
+
+    Entries are keyed by the SHA-256 of the PDF bytes plus a fingerprint of
+    the extractor settings, so changing either forces a fresh parse. Each
+    entry is stored column-wise (one list per field) in msgpack, which keeps
+    repeated keys out of the file. A small pointer per pdf_key records its
+    content hash, so re-chunking can load elements without touching S3.
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, directory: str, fingerprint: str):
+        self.directory = Path(directory)
+        self.fingerprint = fingerprint
+        (self.directory / "keys").mkdir(parents=True, exist_ok=True)
+
+    def _entry_path(self, content_hash: str) -> Path:
+        return self.directory / f"{content_hash}-{self.fingerprint}.msgpack"
+
+    def _key_path(self, pdf_key: str) -> Path:
+        return self.directory / "keys" / hashlib.sha256(pdf_key.encode()).hexdigest()
+
+    def _write_atomic(self, path: Path, data: bytes):
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+    def get(self, content_hash: str) -> Optional[List[Dict[str, Any]]]:
+        """Return cached elements for a PDF's content hash, if present"""
+        path = self._entry_path(content_hash)
+        try:
+            columns = msgpack.unpackb(path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable extraction cache entry {path}: {str(e)}")
+            return None
+
+        if columns.get("version") != self.FORMAT_VERSION:
+            return None
+
+        return [
+            {
+                'text': text,
+                'metadata': {
+                    'type': element_type,
+                    'page_number': page_number,
+                    'coordinates': coordinates
+                }
+            }
+            for text, element_type, page_number, coordinates in zip(
+                columns["text"],
+                columns["type"],
+                columns["page_number"],
+                columns["coordinates"]
+            )
+        ]
+
+    def get_for_key(self, pdf_key: str) -> Optional[List[Dict[str, Any]]]:
+        """Return cached elements for the content last seen under pdf_key"""
+        try:
+            content_hash = self._key_path(pdf_key).read_text()
+        except FileNotFoundError:
+            return None
+        return self.get(content_hash)
+
+    def put(self, content_hash: str, elements: List[Dict[str, Any]]):
+        """Store extracted elements for a PDF's content hash"""
+        columns = {
+            "version": self.FORMAT_VERSION,
+            "text": [e['text'] for e in elements],
+            "type": [e['metadata']['type'] for e in elements],
+            "page_number": [e['metadata']['page_number'] for e in elements],
+            "coordinates": [e['metadata']['coordinates'] for e in elements]
+        }
+        self._write_atomic(self._entry_path(content_hash), msgpack.packb(columns))
+
+    def link(self, pdf_key: str, content_hash: str):
+        """Record which content hash pdf_key currently refers to"""
+        self._write_atomic(self._key_path(pdf_key), content_hash.encode())
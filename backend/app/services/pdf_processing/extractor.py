@@ -1,68 +1,107 @@
 # backend/app/services/pdf_processing/extractor.py
 from unstructured.partition.pdf import partition_pdf
-from pathlib import Path
-import tempfile
-import boto3
+import unstructured
+import asyncio
+import hashlib
+import io
+import json
 from botocore.exceptions import ClientError
-from typing import List, Dict
+from typing import List, Dict, Optional
 import logging
 from app.core.config import settings
+from app.services.s3 import create_s3_client, transfer_config
+from .extraction_cache import ExtractionCache
 
 logger = logging.getLogger(__name__)
 
 
 class PDFExtractor:
+    # Options passed to partition_pdf; part of the extraction cache key
+    PARTITION_OPTIONS = {
+        "strategy": "fast",
+        "extract_images_in_pdf": False,
+        "infer_table_structure": True,
+        "include_metadata": True
+    }
+
     def __init__(self):
-        self.s3 = boto3.client(
-            's3',
-            aws_access_key_id=settings.AWS_ACCESS_KEY,
-            aws_secret_access_key=settings.AWS_SECRET_KEY,
-            region_name=settings.AWS_REGION
+        self.s3 = create_s3_client()
+        self.cache = ExtractionCache(
+            settings.EXTRACTION_CACHE_DIR,
+            self._settings_fingerprint()
         )
 
-    async def download_from_s3(self, key: str) -> Path:
-        """Download PDF from S3 to temporary file"""
+    def _settings_fingerprint(self) -> str:
+        """Digest of everything besides the PDF bytes that affects extraction"""
+        options = {**self.PARTITION_OPTIONS, "unstructured": unstructured.__version__}
+        return hashlib.sha256(json.dumps(options, sort_keys=True).encode()).hexdigest()[:16]
+
+    def _content_hash(self, pdf_buffer: io.BytesIO) -> str:
+        with pdf_buffer.getbuffer() as view:
+            return hashlib.sha256(view).hexdigest()
+
+    async def download_from_s3(self, key: str) -> io.BytesIO:
+        """Download PDF from S3 into memory using parallel ranged GETs"""
         try:
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-                self.s3.download_fileobj(
-                    settings.AWS_BUCKET_NAME, key, tmp_file)
-                return Path(tmp_file.name)
+            pdf_buffer = io.BytesIO()
+            await asyncio.to_thread(
+                self.s3.download_fileobj,
+                settings.AWS_BUCKET_NAME,
+                key,
+                pdf_buffer,
+                Config=transfer_config()
+            )
+            pdf_buffer.seek(0)
+            return pdf_buffer
         except ClientError as e:
             logger.error(f"Error downloading file from S3: {str(e)}")
             raise
 
     async def extract_text(self, pdf_key: str) -> List[Dict[str, str]]:
-        """Extract text from PDF with metadata"""
+        """Extract text from PDF with metadata
+
+        Parsed elements are cached by content hash, so a PDF already seen
+        with the same extractor settings is not parsed again.
+        """
         try:
-            # Download PDF from S3
-            pdf_path = await self.download_from_s3(pdf_key)
+            # Download PDF from S3; it is parsed from memory, no temp file
+            pdf_buffer = await self.download_from_s3(pdf_key)
+            content_hash = self._content_hash(pdf_buffer)
+
+            processed_elements = self.cache.get(content_hash)
+            if processed_elements is not None:
+                logger.info(f"Using cached extraction for {pdf_key}")
+                self.cache.link(pdf_key, content_hash)
+                return processed_elements
 
             # Extract text with metadata
             elements = partition_pdf(
-                filename=str(pdf_path),
-                strategy="fast",
-                extract_images_in_pdf=False,
-                infer_table_structure=True,
-                include_metadata=True
+                file=pdf_buffer,
+                **self.PARTITION_OPTIONS
             )
 
-            # Clean up temporary file
-            pdf_path.unlink()
-
             # Process and structure the extracted elements
             processed_elements = []
             for element in elements:
+                coordinates = element.metadata.coordinates if hasattr(element, 'metadata') else None
                 processed_elements.append({
                     'text': str(element),
                     'metadata': {
                         'type': element.type if hasattr(element, 'type') else 'text',
                         'page_number': element.metadata.page_number if hasattr(element, 'metadata') else None,
-                        'coordinates': element.metadata.coordinates if hasattr(element, 'metadata') else None
+                        # Corner points only, so elements can be cached
+                        'coordinates': [list(point) for point in coordinates.points] if coordinates else None
                     }
                 })
 
+            self.cache.put(content_hash, processed_elements)
+            self.cache.link(pdf_key, content_hash)
             return processed_elements
 
         except Exception as e:
             logger.error(f"Error extracting text from PDF: {str(e)}")
             raise
+
+    def load_cached(self, pdf_key: str) -> Optional[List[Dict[str, str]]]:
+        """Return cached elements for pdf_key without downloading it"""
+        return self.cache.get_for_key(pdf_key)
@@ -1,5 +1,5 @@
 # backend/app/services/pdf_processing/manager.py
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import logging
 from .extractor import PDFExtractor
 from .chunker import PDFChunker
@@ -13,8 +13,10 @@ class ProcessingManager:
     def __init__(self):
         self.extractor = PDFExtractor()
         self.chunker = PDFChunker()
-        self.embedder = create_embedding_generator()
         self.vector_store = QdrantStore()
+        # Embed with the model of the active collection, which follows
+        # migrations rather than settings.EMBEDDING_MODEL
+        self.embedder = create_embedding_generator(self.vector_store.model_name)
 
     async def process_pdf(self, pdf_key: str) -> Dict[str, Any]:
         """Process PDF through the entire pipeline"""
@@ -23,25 +25,62 @@ class ProcessingManager:
             logger.info(f"Starting extraction for {pdf_key}")
             extracted_elements = await self.extractor.extract_text(pdf_key)
 
-            # Create chunks
-            logger.info("Creating chunks")
-            chunks = self.chunker.create_chunks(extracted_elements)
+            return await self._chunk_and_store(pdf_key, extracted_elements, self.chunker)
 
-            # Generate embeddings
-            logger.info("Generating embeddings")
-            embedded_chunks = await self.embedder.generate_embeddings(chunks)
+        except Exception as e:
+            logger.error(f"Error processing PDF {pdf_key}: {str(e)}")
+            raise
+
+    async def rechunk_pdf(self,
+                          pdf_key: str,
+                          chunk_size: Optional[int] = None,
+                          chunk_overlap: Optional[int] = None) -> Dict[str, Any]:
+        """Re-chunk and re-embed a PDF starting from its cached extraction
+
+        Falls back to a full extraction when nothing is cached. New chunks are
+        stored before the old ones are deleted, so searches never see the PDF
+        without chunks.
+        """
+        try:
+            extracted_elements = self.extractor.load_cached(pdf_key)
+            if extracted_elements is None:
+                logger.info(f"No cached extraction for {pdf_key}, extracting")
+                extracted_elements = await self.extractor.extract_text(pdf_key)
 
-            # Store in vector database
-            logger.info("Storing embeddings")
-            await self.vector_store.store_embeddings(embedded_chunks, pdf_key)
+            chunker = PDFChunker(
+                chunk_size=chunk_size or self.chunker.chunk_size,
+                chunk_overlap=chunk_overlap if chunk_overlap is not None else self.chunker.chunk_overlap,
+                min_chunk_size=self.chunker.min_chunk_size
+            )
+            result = await self._chunk_and_store(pdf_key, extracted_elements, chunker)
 
-            return {
-                "status": "success",
-                "pdf_key": pdf_key,
-                "num_chunks": len(chunks),
-                "num_embeddings": len(embedded_chunks)
-            }
+            await self.vector_store.delete_pdf(pdf_key, keep_ids=result["chunk_ids"])
+            return result
 
         except Exception as e:
-            logger.error(f"Error processing PDF {pdf_key}: {str(e)}")
+            logger.error(f"Error re-chunking PDF {pdf_key}: {str(e)}")
             raise
+
+    async def _chunk_and_store(self,
+                               pdf_key: str,
+                               extracted_elements: List[Dict[str, Any]],
+                               chunker: PDFChunker) -> Dict[str, Any]:
+        # Create chunks
+        logger.info("Creating chunks")
+        chunks = chunker.create_chunks(extracted_elements)
+
+        # Generate embeddings
+        logger.info("Generating embeddings")
+        embedded_chunks = await self.embedder.generate_embeddings(chunks)
+
+        # Store in vector database
+        logger.info("Storing embeddings")
+        await self.vector_store.store_embeddings(embedded_chunks, pdf_key)
+
+        return {
+            "status": "success",
+            "pdf_key": pdf_key,
+            "num_chunks": len(chunks),
+            "num_embeddings": len(embedded_chunks),
+            "chunk_ids": [chunk.chunk_id for chunk in chunks]
+        }
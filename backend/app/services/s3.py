@@ -1,23 +1,153 @@
 from boto3 import client
+from boto3.s3.transfer import TransferConfig
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError, NoCredentialsError
 from app.core.config import settings
 from fastapi import HTTPException
+from typing import Dict, List
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
+MB = 1024 * 1024
+
+
+def create_s3_client():
+    """S3 client with a connection pool sized for parallel part transfers"""
+    return boto3.client(
+        's3',
+        aws_access_key_id=settings.AWS_ACCESS_KEY,
+        aws_secret_access_key=settings.AWS_SECRET_KEY,
+        region_name=settings.AWS_REGION,
+        endpoint_url=settings.S3_ENDPOINT_URL,
+        config=Config(max_pool_connections=max(10, settings.S3_MAX_CONCURRENCY * 2))
+    )
+
+
+def transfer_config() -> TransferConfig:
+    """Multipart transfer settings shared by uploads and downloads"""
+    part_size = settings.S3_PART_SIZE_MB * MB
+    return TransferConfig(
+        multipart_threshold=part_size,
+        multipart_chunksize=part_size,
+        max_concurrency=settings.S3_MAX_CONCURRENCY,
+        use_threads=True
+    )
+
+
+class S3MultipartWriter:
+    """Streams bytes to one S3 object as a multipart upload
+
+    Parts are uploaded in worker threads as soon as part_size bytes have
+    arrived. write() waits while max_concurrency parts are in flight, so
+    memory stays bounded at roughly (max_concurrency + 1) * part_size no
+    matter how large the object is.
+    """
+
+    # S3 rejects non-final parts smaller than this
+    MIN_PART_SIZE = 5 * MB
+
+    def __init__(self, s3, bucket: str, key: str,
+                 part_size: int, max_concurrency: int,
+                 content_type: str = 'application/pdf'):
+        self.s3 = s3
+        self.bucket = bucket
+        self.key = key
+        self.part_size = max(part_size, self.MIN_PART_SIZE)
+        self.content_type = content_type
+        self.pending: List[bytes] = []
+        self.pending_size = 0
+        self.upload_id = None
+        self.parts: List[Dict] = []
+        self.tasks: List[asyncio.Task] = []
+        self.slots = asyncio.Semaphore(max_concurrency)
+
+    async def write(self, data: bytes):
+        # Incoming chunks are only joined once, when a part is full; parts
+        # may exceed part_size by less than one chunk
+        self.pending.append(data)
+        self.pending_size += len(data)
+        if self.pending_size >= self.part_size:
+            await self._submit(self._take_pending())
+
+    def _take_pending(self) -> bytes:
+        part = b''.join(self.pending)
+        self.pending.clear()
+        self.pending_size = 0
+        return part
+
+    async def _submit(self, part: bytes):
+        if self.upload_id is None:
+            response = await asyncio.to_thread(
+                self.s3.create_multipart_upload,
+                Bucket=self.bucket, Key=self.key, ContentType=self.content_type
+            )
+            self.upload_id = response['UploadId']
+
+        self._raise_failed()
+        await self.slots.acquire()
+        # A part may have failed while this one waited for a slot
+        self._raise_failed()
+        part_number = len(self.tasks) + 1
+        self.tasks.append(asyncio.create_task(self._upload_part(part_number, part)))
+
+    def _raise_failed(self):
+        """Re-raise the first part failure so the caller stops reading the body"""
+        for task in self.tasks:
+            if task.done() and not task.cancelled() and task.exception() is not None:
+                raise task.exception()
+
+    async def _upload_part(self, part_number: int, part: bytes):
+        try:
+            response = await asyncio.to_thread(
+                self.s3.upload_part,
+                Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+                PartNumber=part_number, Body=part
+            )
+            self.parts.append({'PartNumber': part_number, 'ETag': response['ETag']})
+        finally:
+            self.slots.release()
+
+    async def close(self):
+        """Upload the remaining bytes and complete the object"""
+        if self.upload_id is None:
+            # Smaller than one part: a single PUT is cheaper than multipart
+            await asyncio.to_thread(
+                self.s3.put_object,
+                Bucket=self.bucket, Key=self.key,
+                Body=self._take_pending(), ContentType=self.content_type
+            )
+            return
+
+        if self.pending:
+            await self._submit(self._take_pending())
+        await asyncio.gather(*self.tasks)
+
+        await asyncio.to_thread(
+            self.s3.complete_multipart_upload,
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+            MultipartUpload={'Parts': sorted(self.parts, key=lambda p: p['PartNumber'])}
+        )
+
+    async def abort(self):
+        """Discard uploaded parts after a failure"""
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        if self.upload_id is not None:
+            await asyncio.to_thread(
+                self.s3.abort_multipart_upload,
+                Bucket=self.bucket, Key=self.key, UploadId=self.upload_id
+            )
+
 
 class S3Service:
     def __init__(self):
         self.bucket_name = settings.AWS_BUCKET_NAME
         try:
-            self.s3 = boto3.client(
-                's3',
-                aws_access_key_id=settings.AWS_ACCESS_KEY,
-                aws_secret_access_key=settings.AWS_SECRET_KEY,
-                region_name=settings.AWS_REGION
-            )
+            self.s3 = create_s3_client()
             # Verify credentials and bucket access
             self.verify_setup()
         except Exception as e:
@@ -56,13 +186,15 @@ class S3Service:
             )
 
     async def upload_file(self, file, filename: str):
-        """Upload a file to S3"""
+        """Upload a file to S3 with parallel multipart transfers"""
         try:
-            self.s3.upload_fileobj(
+            await asyncio.to_thread(
+                self.s3.upload_fileobj,
                 file,
                 self.bucket_name,
                 filename,
-                ExtraArgs={'ContentType': 'application/pdf'}
+                ExtraArgs={'ContentType': 'application/pdf'},
+                Config=transfer_config()
             )
             return self.generate_presigned_url(filename)
         except ClientError as e:
@@ -72,6 +204,16 @@ class S3Service:
                 detail=f"Failed to upload file: {str(e)}"
             )
 
+    def open_upload(self, filename: str) -> S3MultipartWriter:
+        """Start a streaming upload; the caller must close() or abort() it"""
+        return S3MultipartWriter(
+            self.s3,
+            self.bucket_name,
+            filename,
+            part_size=settings.S3_PART_SIZE_MB * MB,
+            max_concurrency=settings.S3_MAX_CONCURRENCY
+        )
+
     def generate_presigned_url(self, key: str, expiration=3600):
         """Generate a presigned URL for file access"""
         try:
@@ -0,0 +1,217 @@
+# backend/app/services/vector_store/migration.py
+"""Zero-downtime migration to a new embedding model.
+
+The active collection keeps serving searches while a throttled job
+re-embeds its stored chunk text into a new versioned collection. PDFs are
+not extracted again. Passes copy missing chunks and remove ones deleted
+from the source until a pass finds nothing to change; only then is the
+alias switched, in a single request.
+
+Usage (from backend/):
+    python -m app.services.vector_store.migration --model BAAI/bge-small-en-v1.5
+"""
+import argparse
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from qdrant_client.http.models import PointIdsList, PointStruct
+
+from app.services.pdf_processing.chunker import Chunk
+from app.services.pdf_processing.embedder import create_embedding_generator
+from .qdrant import QdrantStore, versioned_collection_name
+
+logger = logging.getLogger(__name__)
+
+
+class CollectionMigration:
+    def __init__(self,
+                 store: QdrantStore,
+                 model_name: str,
+                 page_size: int = 256,
+                 max_chunks_per_second: float = 200.0,
+                 max_passes: int = 5):
+        self.store = store
+        self.embedder = create_embedding_generator(model_name)
+        self.page_size = page_size
+        self.max_chunks_per_second = max_chunks_per_second
+        self.max_passes = max_passes
+        self.source = store.collection_name
+        self.target = versioned_collection_name(
+            self.embedder.model_name, self.embedder.dimension)
+
+    async def run(self, drop_source_after: Optional[float] = None) -> Dict[str, Any]:
+        """Populate the target collection, switch the alias, optionally drop the source"""
+        if self.source == self.target:
+            logger.info(f"{self.target} is already active")
+            return {"status": "unchanged", "collection": self.target}
+
+        self.store.create_collection(self.target, self.embedder.dimension)
+
+        # Chunks ingested or deleted while a pass runs can land behind its
+        # cursor, so keep syncing until a pass finds nothing to change; that
+        # pass runs right before the switch and proves the target complete
+        copied = 0
+        for attempt in range(self.max_passes):
+            pass_copied = await self._copy_missing()
+            pass_removed = self._remove_stale()
+            copied += pass_copied
+            logger.info(f"Migration pass {attempt + 1}: copied {pass_copied}, "
+                        f"removed {pass_removed} chunks")
+            if pass_copied == 0 and pass_removed == 0:
+                break
+        else:
+            raise RuntimeError(
+                f"{self.target} was still changing after {self.max_passes} passes; "
+                f"alias left on {self.source}, re-run to resume")
+
+        unversioned_source = self.source == self.store.alias_name
+        if unversioned_source:
+            # An unversioned collection holds the alias name, so it must go
+            # before the alias can be created; this one-off step is not atomic
+            self.store.client.delete_collection(self.source)
+            drop_source_after = None
+        self.store.activate_collection(self.target)
+
+        if not unversioned_source:
+            # Writers that resolved the old collection before the switch may
+            # still add to it; copy those over. The target now takes writes
+            # of its own, so nothing is removed from it any more
+            copied += await self._copy_missing()
+
+        if drop_source_after is not None:
+            # Searches that resolved the old collection just before the
+            # switch finish against it before it is removed
+            await asyncio.sleep(drop_source_after)
+            copied += await self._copy_missing()
+            self.store.client.delete_collection(self.source)
+            logger.info(f"Dropped collection {self.source}")
+
+        return {
+            "status": "migrated",
+            "source": self.source,
+            "collection": self.target,
+            "num_chunks": copied
+        }
+
+    async def _copy_missing(self) -> int:
+        """Re-embed source chunks that are not yet in the target collection"""
+        copied = 0
+        offset = None
+        while True:
+            started = time.monotonic()
+            records, offset = self.store.client.scroll(
+                collection_name=self.source,
+                limit=self.page_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=False
+            )
+
+            if not records:
+                return copied
+
+            existing = {
+                str(record.id) for record in self.store.client.retrieve(
+                    collection_name=self.target,
+                    ids=[record.id for record in records],
+                    with_payload=False,
+                    with_vectors=False
+                )
+            }
+            missing = [record for record in records if str(record.id) not in existing]
+
+            if missing:
+                chunks = [
+                    Chunk(
+                        text=record.payload["text"],
+                        metadata=record.payload["metadata"],
+                        chunk_id=str(record.id),
+                        start_page=record.payload["metadata"].get("start_page"),
+                        end_page=record.payload["metadata"].get("end_page"),
+                        chunk_type="text"
+                    )
+                    for record in missing
+                ]
+                embedded_chunks = await self.embedder.generate_embeddings(chunks)
+                self.store.client.upsert(
+                    collection_name=self.target,
+                    points=[
+                        PointStruct(
+                            id=record.id,
+                            vector=embedded.embedding.tolist(),
+                            payload={**record.payload, "metadata": embedded.metadata}
+                        )
+                        for record, embedded in zip(missing, embedded_chunks)
+                    ]
+                )
+                copied += len(missing)
+
+                # Throttle so the job does not starve live ingestion and search
+                min_duration = len(missing) / self.max_chunks_per_second
+                elapsed = time.monotonic() - started
+                if elapsed < min_duration:
+                    await asyncio.sleep(min_duration - elapsed)
+
+            if offset is None:
+                return copied
+
+    def _remove_stale(self) -> int:
+        """Delete target chunks that no longer exist in the source collection"""
+        removed = 0
+        offset = None
+        while True:
+            records, offset = self.store.client.scroll(
+                collection_name=self.target,
+                limit=self.page_size,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False
+            )
+
+            if records:
+                present = {
+                    str(record.id) for record in self.store.client.retrieve(
+                        collection_name=self.source,
+                        ids=[record.id for record in records],
+                        with_payload=False,
+                        with_vectors=False
+                    )
+                }
+                # Deleted or re-chunked in the source since they were copied
+                stale = [record.id for record in records if str(record.id) not in present]
+                if stale:
+                    self.store.client.delete(
+                        collection_name=self.target,
+                        points_selector=PointIdsList(points=stale)
+                    )
+                    removed += len(stale)
+
+            if not records or offset is None:
+                return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-embed chunks with a new model")
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--page-size", type=int, default=256)
+    parser.add_argument("--max-chunks-per-second", type=float, default=200.0)
+    parser.add_argument("--max-passes", type=int, default=5)
+    parser.add_argument("--drop-source-after", type=float, default=None,
+                        help="seconds to keep the old collection after switching")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    migration = CollectionMigration(
+        QdrantStore(),
+        args.model,
+        page_size=args.page_size,
+        max_chunks_per_second=args.max_chunks_per_second,
+        max_passes=args.max_passes
+    )
+    print(asyncio.run(migration.run(drop_source_after=args.drop_source_after)))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,10 +6,18 @@ from qdrant_client.http.models import (
     PointStruct,
     Filter,
     FieldCondition,
-    Match
+    HasIdCondition,
+    MatchAny,
+    MatchValue,
+    Range,
+    PayloadSchemaType,
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation
 )
-from typing import List, Dict, Any, Optional
-from app.services.pdf_processing.embedder import EmbeddedChunk
+from typing import List, Dict, Any, Optional, Tuple
+from app.services.pdf_processing.embedder import EmbeddedChunk, create_embedding_generator
 import numpy as np
 from app.core.config import settings
 import logging
@@ -17,15 +25,127 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def versioned_collection_name(model_name: str, dimension: int) -> str:
+    """Collection name tagged with the embedding model and dimension"""
+    return f"{settings.QDRANT_COLLECTION}__{model_name.replace('/', '--')}__{dimension}"
+
+
+def parse_collection_name(collection_name: str) -> Tuple[Optional[str], Optional[int]]:
+    """Recover (model, dimension) from a versioned collection name"""
+    parts = collection_name.rsplit("__", 2)
+    if len(parts) != 3 or parts[0] != settings.QDRANT_COLLECTION or not parts[2].isdigit():
+        # Unversioned collection: embedded with the configured model
+        return None, None
+    return parts[1].replace("--", "/"), int(parts[2])
+
+
+def maximal_marginal_relevance(
+    query_scores: np.ndarray,
+    vectors: Optional[np.ndarray],
+    k: int,
+    lambda_mult: float = 0.5,
+    groups: Optional[List[Any]] = None,
+    max_per_group: Optional[int] = None
+) -> List[int]:
+    """Greedily pick k candidate indices balancing relevance and novelty
+
+    Each step takes the candidate maximising
+    lambda_mult * relevance - (1 - lambda_mult) * max similarity to the
+    candidates already picked. Pairwise similarities come from a single
+    matrix product; each step is then one vectorised update. Candidates whose
+    group already has max_per_group picks are skipped.
+    """
+    n = len(query_scores)
+    if n == 0:
+        return []
+    if vectors is not None and lambda_mult < 1.0:
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        similarity = vectors @ vectors.T
+    else:
+        similarity = None
+
+    selected = []
+    group_counts: Dict[Any, int] = {}
+    max_similarity = np.zeros(n, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+
+    while len(selected) < k and available.any():
+        mmr_scores = lambda_mult * query_scores - (1 - lambda_mult) * max_similarity
+        mmr_scores[~available] = -np.inf
+        best = int(np.argmax(mmr_scores))
+        available[best] = False
+
+        if groups is not None and max_per_group is not None:
+            if group_counts.get(groups[best], 0) >= max_per_group:
+                continue
+            group_counts[groups[best]] = group_counts.get(groups[best], 0) + 1
+
+        selected.append(best)
+        if similarity is not None:
+            np.maximum(max_similarity, similarity[best], out=max_similarity)
+
+    return selected
+
+
+def _trim_overlap(previous: str, text: str, min_overlap: int = 20) -> str:
+    """Drop the start of text that repeats the end of previous
+
+    When the chunker splits a long element it starts the next chunk with
+    the last chunk_overlap characters of the previous one. Shorter repeats
+    are left alone, as they may be coincidental.
+    """
+    probe = text[:min_overlap]
+    if len(probe) < min_overlap:
+        return text
+    # The earliest match in previous gives the longest overlap
+    start = previous.find(probe)
+    while start != -1:
+        if text.startswith(previous[start:]):
+            return text[len(previous) - start:].lstrip()
+        start = previous.find(probe, start + 1)
+    return text
+
+
+def _join_chunk_texts(texts: List[Optional[str]]) -> str:
+    """Join consecutive chunk texts (None for missing seqs) without repeated overlap"""
+    parts = []
+    previous = None
+    for text in texts:
+        if text is None:
+            previous = None
+            continue
+        trimmed = text if previous is None else _trim_overlap(previous, text)
+        if trimmed:
+            parts.append(trimmed)
+        previous = text
+    return " ".join(parts)
+
+
 class QdrantStore:
+    # Candidates fetched per requested result when re-selecting results
+    MMR_CANDIDATE_FACTOR = 4
+    # pdf_key filters every scoped search; seq (position of the chunk within
+    # its PDF) serves neighbour range lookups
+    PAYLOAD_INDEXES = {
+        "pdf_key": PayloadSchemaType.KEYWORD,
+        "seq": PayloadSchemaType.INTEGER
+    }
+    _indexed_collections = set()
+
     def __init__(self):
-        """Initialize Qdrant client"""
+        """Initialize Qdrant client
+
+        settings.QDRANT_COLLECTION is an alias for the active versioned
+        collection. It is resolved once here, so a store instance keeps using
+        the same collection (and model) even if a migration switches the alias
+        while a request is in flight.
+        """
         try:
             self.client = QdrantClient(
                 url=settings.QDRANT_URL,
                 api_key=settings.QDRANT_API_KEY,
             )
-            self.collection_name = settings.QDRANT_COLLECTION
+            self.alias_name = settings.QDRANT_COLLECTION
             self._ensure_collection()
             logger.info(f"Connected to Qdrant at {settings.QDRANT_URL}")
         except Exception as e:
@@ -33,39 +153,107 @@ class QdrantStore:
             raise
 
     def _ensure_collection(self):
-        """Ensure collection exists with correct settings"""
+        """Resolve the active collection, creating a versioned one if none exists"""
         try:
+            aliases = {
+                alias.alias_name: alias.collection_name
+                for alias in self.client.get_aliases().aliases
+            }
+            if self.alias_name in aliases:
+                self.collection_name = aliases[self.alias_name]
+                self.model_name, _ = parse_collection_name(self.collection_name)
+                self._ensure_payload_indexes(self.collection_name)
+                return
+
             collections = self.client.get_collections().collections
             collection_names = [c.name for c in collections]
 
-            if self.collection_name not in collection_names:
-                self.client.create_collection(
-                    collection_name=self.collection_name,
-                    vectors_config=VectorParams(
-                        size=settings.EMBEDDING_DIMENSION,
-                        distance=Distance.COSINE
-                    )
-                )
-                logger.info(f"Created collection: {self.collection_name}")
+            if self.alias_name in collection_names:
+                # Collection created before versioning; model is the configured one
+                self.collection_name = self.alias_name
+                self.model_name = None
+                self._ensure_payload_indexes(self.collection_name)
+                return
+
+            embedder = create_embedding_generator()
+            self.collection_name = versioned_collection_name(
+                embedder.model_name, embedder.dimension)
+            self.model_name = embedder.model_name
+            self.create_collection(self.collection_name, embedder.dimension)
+            self.activate_collection(self.collection_name)
         except Exception as e:
             logger.error(f"Failed to ensure collection: {str(e)}")
             raise
 
+    def create_collection(self, collection_name: str, dimension: int):
+        """Create a collection (if missing) with pdf_key and seq payload indexes"""
+        collection_names = [c.name for c in self.client.get_collections().collections]
+        if collection_name in collection_names:
+            return
+
+        self.client.create_collection(
+            collection_name=collection_name,
+            vectors_config=VectorParams(
+                size=dimension,
+                distance=Distance.COSINE
+            )
+        )
+        self._ensure_payload_indexes(collection_name)
+        logger.info(f"Created collection: {collection_name}")
+
+    def _ensure_payload_indexes(self, collection_name: str):
+        """Create the payload indexes, also on collections made before they existed
+
+        Index creation is idempotent in Qdrant; each collection is checked
+        once per process so searches do not pay a round trip every time.
+        """
+        if collection_name in self._indexed_collections:
+            return
+        for field_name, field_schema in self.PAYLOAD_INDEXES.items():
+            self.client.create_payload_index(
+                collection_name=collection_name,
+                field_name=field_name,
+                field_schema=field_schema
+            )
+        self._indexed_collections.add(collection_name)
+
+    def activate_collection(self, collection_name: str):
+        """Atomically point the alias at collection_name"""
+        aliases = [alias.alias_name for alias in self.client.get_aliases().aliases]
+        operations = []
+        if self.alias_name in aliases:
+            operations.append(DeleteAliasOperation(
+                delete_alias=DeleteAlias(alias_name=self.alias_name)))
+        operations.append(CreateAliasOperation(
+            create_alias=CreateAlias(
+                collection_name=collection_name,
+                alias_name=self.alias_name
+            )))
+
+        # Both operations are applied in one request, so searches see either
+        # the old collection or the new one, never neither
+        self.client.update_collection_aliases(change_aliases_operations=operations)
+        logger.info(f"Alias {self.alias_name} now points to {collection_name}")
+
     async def store_embeddings(
         self,
         embedded_chunks: List[EmbeddedChunk],
         pdf_key: str
     ) -> bool:
-        """Store embeddings in Qdrant"""
+        """Store embeddings in Qdrant
+
+        Chunks must be in document order; each gets its position as seq.
+        """
         try:
             points = []
-            for chunk in embedded_chunks:
+            for seq, chunk in enumerate(embedded_chunks):
                 point = PointStruct(
                     id=chunk.chunk_id,
                     vector=chunk.embedding.tolist(),
                     payload={
                         "text": chunk.text,
                         "pdf_key": pdf_key,
+                        "seq": seq,
                         "metadata": chunk.metadata
                     }
                 )
@@ -91,36 +279,81 @@ class QdrantStore:
         self,
         query_vector: np.ndarray,
         pdf_key: Optional[str] = None,
-        limit: int = 5
+        limit: int = 5,
+        fields: Optional[List[str]] = None,
+        pdf_keys: Optional[List[str]] = None,
+        max_per_document: Optional[int] = None,
+        mmr_lambda: Optional[float] = None
     ) -> List[Dict[str, Any]]:
-        """Search for similar chunks"""
+        """Search for similar chunks
+
+        fields limits the payload keys Qdrant returns (all when None), so
+        callers that only need ids and scores do not pay for chunk text.
+        pdf_keys restricts the search to several PDFs. When max_per_document
+        or mmr_lambda is set, a larger candidate pool is fetched and
+        re-selected with maximal_marginal_relevance.
+        """
         try:
-            search_filter = None
+            keys = list(pdf_keys or [])
             if pdf_key:
+                keys.append(pdf_key)
+
+            search_filter = None
+            if keys:
                 search_filter = Filter(
                     must=[
                         FieldCondition(
                             key="pdf_key",
-                            match=Match(value=pdf_key)
+                            match=MatchValue(value=keys[0]) if len(keys) == 1 else MatchAny(any=keys)
                         )
                     ]
                 )
 
+            # At lambda 1.0 MMR is plain score order, so vectors are not needed
+            use_mmr = mmr_lambda is not None and mmr_lambda < 1
+            rerank = use_mmr or max_per_document is not None
+            with_payload = True if fields is None else (fields or False)
+            # Payload keys fetched only to re-select results, not returned
+            selection_keys = []
+            if max_per_document is not None and fields is not None and "pdf_key" not in fields:
+                with_payload = [*fields, "pdf_key"]
+                selection_keys.append("pdf_key")
+
             search_results = self.client.search(
                 collection_name=self.collection_name,
                 query_vector=query_vector.tolist(),
-                limit=limit,
-                query_filter=search_filter
+                limit=limit * self.MMR_CANDIDATE_FACTOR if rerank else limit,
+                query_filter=search_filter,
+                with_payload=with_payload,
+                with_vectors=use_mmr
             )
 
+            if rerank:
+                if use_mmr:
+                    vectors = np.array([result.vector for result in search_results], dtype=np.float32)
+                else:
+                    # Without MMR only scores and the per-document cap matter
+                    vectors = None
+                selected = maximal_marginal_relevance(
+                    np.array([result.score for result in search_results], dtype=np.float32),
+                    vectors,
+                    limit,
+                    lambda_mult=mmr_lambda if use_mmr else 1.0,
+                    groups=[result.payload.get("pdf_key") for result in search_results]
+                    if max_per_document is not None else None,
+                    max_per_group=max_per_document
+                )
+                search_results = [search_results[i] for i in selected]
+
             results = []
             for result in search_results:
+                payload = result.payload or {}
+                for key in selection_keys:
+                    payload.pop(key, None)
                 results.append({
-                    "chunk_id": result.id,
-                    "text": result.payload["text"],
-                    "pdf_key": result.payload["pdf_key"],
-                    "metadata": result.payload["metadata"],
-                    "score": result.score
+                    "chunk_id": str(result.id),
+                    "score": result.score,
+                    **payload
                 })
 
             return results
@@ -129,8 +362,81 @@ class QdrantStore:
             logger.error(f"Failed to search vectors: {str(e)}")
             raise
 
-    async def delete_pdf(self, pdf_key: str) -> bool:
-        """Delete all chunks for a specific PDF"""
+    async def attach_neighbor_context(self, results: List[Dict[str, Any]], n: int):
+        """Add the text of the n chunks either side of each hit as "context"
+
+        Windows of hits in the same PDF that overlap or touch are merged, and
+        all windows are fetched with a single scroll. Each hit gets the merged
+        window it falls in: {"start_seq", "end_seq", "text"}, with the overlap
+        the chunker repeats between consecutive chunks removed. Hits without
+        a seq (stored before sequence numbers existed) are left unchanged.
+        """
+        try:
+            windows: Dict[str, List[List[int]]] = {}
+            for result in results:
+                if result.get("seq") is not None and result.get("pdf_key"):
+                    windows.setdefault(result["pdf_key"], []).append(
+                        [max(0, result["seq"] - n), result["seq"] + n])
+
+            merged: Dict[str, List[List[int]]] = {}
+            for pdf_key, spans in windows.items():
+                spans.sort()
+                merged[pdf_key] = [spans[0]]
+                for start, end in spans[1:]:
+                    if start <= merged[pdf_key][-1][1] + 1:
+                        merged[pdf_key][-1][1] = max(merged[pdf_key][-1][1], end)
+                    else:
+                        merged[pdf_key].append([start, end])
+
+            if not merged:
+                return
+
+            records, _ = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=Filter(
+                    should=[
+                        Filter(must=[
+                            FieldCondition(key="pdf_key", match=MatchValue(value=pdf_key)),
+                            FieldCondition(key="seq", range=Range(gte=start, lte=end))
+                        ])
+                        for pdf_key, spans in merged.items()
+                        for start, end in spans
+                    ]
+                ),
+                limit=sum(end - start + 1 for spans in merged.values() for start, end in spans),
+                with_payload=["text", "pdf_key", "seq"],
+                with_vectors=False
+            )
+            texts = {
+                (record.payload["pdf_key"], record.payload["seq"]): record.payload["text"]
+                for record in records
+            }
+
+            contexts = {}
+            for pdf_key, spans in merged.items():
+                for start, end in spans:
+                    contexts[(pdf_key, start)] = {
+                        "start_seq": start,
+                        "end_seq": end,
+                        "text": _join_chunk_texts(
+                            [texts.get((pdf_key, seq)) for seq in range(start, end + 1)]
+                        )
+                    }
+
+            for result in results:
+                if result.get("seq") is None or not result.get("pdf_key"):
+                    continue
+                for start, end in merged[result["pdf_key"]]:
+                    if start <= result["seq"] <= end:
+                        result["context"] = contexts[(result["pdf_key"], start)]
+                        break
+
+        except Exception as e:
+            logger.error(f"Failed to expand neighbor context: {str(e)}")
+            raise
+
+    async def delete_pdf(self, pdf_key: str, keep_ids: Optional[List[str]] = None) -> bool:
+        """Delete all chunks for a specific PDF, except those in keep_ids"""
         try:
             self.client.delete(
                 collection_name=self.collection_name,
@@ -138,9 +444,10 @@ class QdrantStore:
                     must=[
                         FieldCondition(
                             key="pdf_key",
-                            match=Match(value=pdf_key)
+                            match=MatchValue(value=pdf_key)
                         )
-                    ]
+                    ],
+                    must_not=[HasIdCondition(has_id=keep_ids)] if keep_ids else None
                 )
             )
             logger.info(f"Deleted all chunks for PDF {pdf_key}")
@@ -0,0 +1,118 @@
+# backend/benchmarks/admission_load.py
+"""Open-loop overload test for admission control.
+
+A stand-in backend serves at most --workers requests at a time with a fixed
+service time, like the embedding model and Qdrant behind /search. Requests
+arrive at --overload times that capacity, and latencies of successful
+requests are compared with and without AdmissionMiddleware. Without it the
+backlog (and p99) grows for as long as the overload lasts. With it the
+backlog is bounded by the queue-time budget and the excess is shed with
+429/503.
+
+Usage (from backend/):
+    python -m benchmarks.admission_load --seconds 3 --overload 3
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+
+import httpx
+from fastapi import FastAPI
+
+from app.core.admission import AdmissionController, AdmissionMiddleware, TrafficClass
+
+
+def build_app(workers: int, service_time: float, admission: bool) -> FastAPI:
+    app = FastAPI()
+    backend = asyncio.Semaphore(workers)
+
+    async def work():
+        async with backend:
+            await asyncio.sleep(service_time)
+        return {"ok": True}
+
+    app.post("/api/v1/search")(work)
+    app.post("/api/v1/upload-pdf")(work)
+
+    if admission:
+        controller = AdmissionController(
+            capacity=workers,
+            classes=[
+                TrafficClass("search", priority=0, max_concurrency=workers,
+                             max_queue=4 * workers, max_wait=0.2),
+                TrafficClass("ingest", priority=1, max_concurrency=max(1, workers // 4),
+                             max_queue=workers, max_wait=1.0),
+            ]
+        )
+        app.add_middleware(
+            AdmissionMiddleware,
+            controller=controller,
+            routes={"/api/v1/search": "search", "/api/v1/upload-pdf": "ingest"}
+        )
+    return app
+
+
+async def run(app, rate: float, seconds: float, ingest_share: float):
+    latencies = {"search": [], "ingest": []}
+    statuses = Counter()
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as client:
+        async def one(kind):
+            path = "/api/v1/search" if kind == "search" else "/api/v1/upload-pdf"
+            start = time.perf_counter()
+            response = await client.post(path)
+            statuses[(kind, response.status_code)] += 1
+            if response.status_code == 200:
+                latencies[kind].append(time.perf_counter() - start)
+
+        tasks = []
+        total = int(rate * seconds)
+        every = round(1 / ingest_share) if ingest_share else 0
+        started = time.perf_counter()
+        for i in range(total):
+            # Open loop: arrivals follow the schedule regardless of responses
+            delay = started + i / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            kind = "ingest" if every and i % every == 0 else "search"
+            tasks.append(asyncio.create_task(one(kind)))
+        await asyncio.gather(*tasks)
+
+    return latencies, statuses
+
+
+def percentile(values, q):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--service-ms", type=float, default=20.0)
+    parser.add_argument("--overload", type=float, default=3.0)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--ingest-share", type=float, default=0.1)
+    args = parser.parse_args()
+
+    service_time = args.service_ms / 1000
+    rate = args.overload * args.workers / service_time
+    print(f"capacity {args.workers / service_time:.0f} req/s, offered {rate:.0f} req/s "
+          f"for {args.seconds:.0f}s")
+
+    for admission in (False, True):
+        app = build_app(args.workers, service_time, admission)
+        latencies, statuses = asyncio.run(run(app, rate, args.seconds, args.ingest_share))
+        print(f"\nadmission {'on' if admission else 'off'}:")
+        for kind, values in latencies.items():
+            codes = ", ".join(f"{code}: {count}" for (k, code), count in sorted(statuses.items()) if k == kind)
+            print(f"  {kind:<7} p50 {percentile(values, 0.5) * 1000:8.1f} ms   "
+                  f"p99 {percentile(values, 0.99) * 1000:8.1f} ms   ({codes})")
+
+
+if __name__ == "__main__":
+    main()
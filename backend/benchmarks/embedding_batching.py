@@ -0,0 +1,83 @@
+# backend/benchmarks/embedding_batching.py
+"""Compare fixed-size and length-bucketed embedding batches on real PDFs.
+
+Usage (from backend/):
+    python -m benchmarks.embedding_batching path/to/a.pdf path/to/b.pdf
+"""
+import argparse
+import asyncio
+import time
+
+from unstructured.partition.pdf import partition_pdf
+
+from app.services.pdf_processing.chunker import PDFChunker
+from app.services.pdf_processing.embedder import EmbeddingGenerator
+from app.core.config import settings
+
+
+def load_chunks(paths, chunk_size):
+    chunker = PDFChunker(chunk_size=chunk_size)
+    chunks = []
+    for path in paths:
+        elements = partition_pdf(filename=path, strategy="fast",
+                                 include_metadata=True)
+        chunks.extend(chunker.create_chunks([
+            {
+                'text': str(element),
+                'metadata': {
+                    'type': getattr(element, 'type', 'text'),
+                    'page_number': element.metadata.page_number,
+                }
+            }
+            for element in elements
+        ]))
+    return chunks
+
+
+def fixed_batches(generator, texts, batch_size=32):
+    # Previous behaviour: document order, 32 chunks per encode call
+    for i in range(0, len(texts), batch_size):
+        generator.model.encode(texts[i:i + batch_size],
+                               batch_size=batch_size,
+                               show_progress_bar=False,
+                               convert_to_numpy=True,
+                               normalize_embeddings=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("pdfs", nargs="+")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--chunk-size", type=int, default=PDFChunker().chunk_size,
+                        help="chunker size in estimated tokens")
+    args = parser.parse_args()
+
+    chunks = load_chunks(args.pdfs, args.chunk_size)
+    texts = [chunk.text for chunk in chunks]
+    generator = EmbeddingGenerator(settings.EMBEDDING_MODEL)
+    lengths = sorted(len(text) for text in texts)
+    print(f"{len(chunks)} chunks from {len(args.pdfs)} PDFs on {generator.device}, "
+          f"chunk length p10/p50/p90 {lengths[len(lengths) // 10]}/"
+          f"{lengths[len(lengths) // 2]}/{lengths[len(lengths) * 9 // 10]} chars")
+
+    # Warm up so model loading and kernel selection are not timed
+    fixed_batches(generator, texts[:32])
+
+    timings = {}
+    for name, run in (
+        ("fixed-32", lambda: fixed_batches(generator, texts)),
+        ("bucketed", lambda: asyncio.run(generator.generate_embeddings(chunks))),
+    ):
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best
+        print(f"{name:>10}: {best:.3f}s ({len(chunks) / best:.1f} chunks/s)")
+
+    print(f"speedup: {timings['fixed-32'] / timings['bucketed']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# backend/benchmarks/openai_standin.py
+"""Drive OpenAIEmbeddingGenerator against a local stand-in embeddings API.
+
+The stand-in answers POST /v1/embeddings with random vectors after a
+simulated latency, and rejects a fraction of requests with 429 and a
+Retry-After header, so concurrency, budgeting and retries can be exercised
+without network access or an API key.
+
+Usage (from backend/):
+    python -m benchmarks.openai_standin --chunks 2000 --latency 0.2 --error-rate 0.1
+"""
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.services.pdf_processing.chunker import Chunk
+from app.services.pdf_processing.embedder import OpenAIEmbeddingGenerator
+
+
+def make_handler(latency, error_rate, dimension, stats):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            time.sleep(latency)
+
+            with stats["lock"]:
+                stats["requests"] += 1
+                rejected = random.random() < error_rate
+                if rejected:
+                    stats["rejected"] += 1
+
+            if rejected:
+                payload = {"error": {"message": "Rate limit reached",
+                                     "type": "requests", "code": "rate_limit_exceeded"}}
+                self._send(429, payload, {"Retry-After": "0.1"})
+                return
+
+            data = [
+                {"object": "embedding", "index": i,
+                 "embedding": [random.random() for _ in range(dimension)]}
+                for i in range(len(body["input"]))
+            ]
+            self._send(200, {
+                "object": "list", "data": data, "model": body["model"],
+                "usage": {"prompt_tokens": 0, "total_tokens": 0}
+            })
+
+        def _send(self, status, payload, headers=None):
+            raw = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(raw)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--chunk-chars", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.1)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    stats = {"lock": threading.Lock(), "requests": 0, "rejected": 0}
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0),
+        make_handler(args.latency, args.error_rate, 1536, stats)
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    generator = OpenAIEmbeddingGenerator(
+        "test-key",
+        base_url=f"http://127.0.0.1:{server.server_port}/v1",
+        max_concurrency=args.concurrency
+    )
+    chunks = [
+        Chunk(text="x" * random.randint(args.chunk_chars // 4, args.chunk_chars),
+              metadata={}, chunk_id=str(i), start_page=1, end_page=1,
+              chunk_type="text")
+        for i in range(args.chunks)
+    ]
+
+    start = time.perf_counter()
+    embedded = asyncio.run(generator.generate_embeddings(chunks))
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    assert [c.chunk_id for c in embedded] == [c.chunk_id for c in chunks]
+    print(f"{len(embedded)} chunks in {elapsed:.2f}s "
+          f"({stats['requests']} requests, {stats['rejected']} rejected with 429)")
+
+
+if __name__ == "__main__":
+    main()
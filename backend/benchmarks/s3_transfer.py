@@ -0,0 +1,188 @@
+# backend/benchmarks/s3_transfer.py
+"""Measure S3 upload/download throughput and peak RSS for large PDFs.
+
+Runs against a local S3 stand-in (moto server in a subprocess, so its
+storage does not count towards this process's RSS) and compares:
+
+  upload   UploadFile (spooled by starlette) + default upload_fileobj
+           (previous behaviour)
+           vs. the streaming /upload-pdf multipart parser + S3MultipartWriter
+  download download_fileobj into a temp file (previous behaviour)
+           vs. the tuned in-memory download used by PDFExtractor
+
+Usage (from backend/, needs `pip install "moto[server]"`):
+    python -m benchmarks.s3_transfer --size-mb 128
+"""
+import argparse
+import asyncio
+import io
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BUCKET = "benchmark-bucket"
+BODY_CHUNK = 64 * 1024
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def rss_bytes():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+class PeakRSS:
+    """Samples RSS in a background thread; reports the peak above the start"""
+
+    def __enter__(self):
+        self.start = self.peak = rss_bytes()
+        self.running = True
+        self.thread = threading.Thread(target=self._sample, daemon=True)
+        self.thread.start()
+        return self
+
+    def _sample(self):
+        while self.running:
+            self.peak = max(self.peak, rss_bytes())
+            time.sleep(0.005)
+
+    def __exit__(self, *exc):
+        self.running = False
+        self.thread.join()
+        self.delta = self.peak - self.start
+
+
+def pdf_chunks(size):
+    """Yield size bytes of PDF-looking data without holding it all"""
+    block = os.urandom(BODY_CHUNK)
+    yield b"%PDF-1.7\n"
+    remaining = size - 9
+    while remaining > 0:
+        yield block[:min(BODY_CHUNK, remaining)]
+        remaining -= BODY_CHUNK
+
+
+class StreamingRequest:
+    """Minimal stand-in for starlette's Request: headers and body stream"""
+
+    def __init__(self, size, boundary="benchmarkboundary"):
+        self.size = size
+        self.boundary = boundary
+        self.headers = {"content-type": f"multipart/form-data; boundary={boundary}"}
+
+    async def stream(self):
+        yield (f"--{self.boundary}\r\n"
+               'Content-Disposition: form-data; name="file"; filename="big.pdf"\r\n'
+               "Content-Type: application/pdf\r\n\r\n").encode()
+        for chunk in pdf_chunks(self.size):
+            yield chunk
+        yield f"\r\n--{self.boundary}--\r\n".encode()
+
+
+async def spooled_upload_file(request):
+    """Parse the body the way FastAPI does for an UploadFile parameter"""
+    from starlette.requests import Request
+
+    body = request.stream()
+
+    async def receive():
+        try:
+            return {"type": "http.request", "body": await body.__anext__(), "more_body": True}
+        except StopAsyncIteration:
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+    scope = {
+        "type": "http", "method": "POST",
+        "headers": [(b"content-type", request.headers["content-type"].encode())]
+    }
+    form = await Request(scope, receive).form()
+    return form["file"]
+
+
+def report(name, size, seconds, rss):
+    print(f"{name:<34} {size / seconds / 2**20:8.1f} MB/s   peak RSS +{rss / 2**20:7.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=128)
+    args = parser.parse_args()
+    size = args.size_mb * 2**20
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "moto.server", "-p", str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    os.environ.update({
+        "AWS_ACCESS_KEY": "testing", "AWS_SECRET_KEY": "testing",
+        "AWS_BUCKET_NAME": BUCKET, "AWS_REGION": "us-east-1",
+        "S3_ENDPOINT_URL": f"http://127.0.0.1:{port}",
+    })
+    os.environ.setdefault("QDRANT_API_KEY", "unused")
+
+    try:
+        for _ in range(100):
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+                break
+            except OSError:
+                time.sleep(0.1)
+
+        from app.services.s3 import create_s3_client, transfer_config
+        create_s3_client().create_bucket(Bucket=BUCKET)
+
+        from app.api.routes import pdf
+        s3 = pdf.s3_service.s3
+
+        # Upload, previous behaviour: UploadFile spools the body, then it is re-read
+        with PeakRSS() as rss:
+            start = time.perf_counter()
+            upload = asyncio.run(spooled_upload_file(StreamingRequest(size)))
+            s3.upload_fileobj(upload.file, BUCKET, "old.pdf",
+                              ExtraArgs={"ContentType": "application/pdf"})
+            elapsed = time.perf_counter() - start
+            upload.file.close()
+        report("upload: UploadFile + default config", size, elapsed, rss.delta)
+
+        with PeakRSS() as rss:
+            start = time.perf_counter()
+            asyncio.run(pdf._stream_pdf_to_s3(StreamingRequest(size)))
+            elapsed = time.perf_counter() - start
+        report("upload: streaming multipart", size, elapsed, rss.delta)
+
+        # Download, previous behaviour: temp file with default config
+        with PeakRSS() as rss:
+            start = time.perf_counter()
+            with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp_file:
+                s3.download_fileobj(BUCKET, "old.pdf", tmp_file)
+            elapsed = time.perf_counter() - start
+        report("download: temp file, default", size, elapsed, rss.delta)
+
+        # Same transfer as PDFExtractor.download_from_s3
+        with PeakRSS() as rss:
+            start = time.perf_counter()
+            buffer = io.BytesIO()
+            s3.download_fileobj(BUCKET, "old.pdf", buffer, Config=transfer_config())
+            elapsed = time.perf_counter() - start
+            assert buffer.getbuffer().nbytes == size
+            del buffer
+        report("download: in-memory, tuned", size, elapsed, rss.delta)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
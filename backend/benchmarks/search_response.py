@@ -0,0 +1,128 @@
+# backend/benchmarks/search_response.py
+"""Response size and latency of /search before and after payload projection.
+
+Qdrant and the embedding model are replaced by in-process fakes returning
+synthetic hits (1,000-character chunks with page metadata), so only the
+response path is measured: payload projection, snippet trimming and
+serialisation. Savings in Qdrant payload transfer come on top of this.
+
+Usage (from backend/):
+    python -m benchmarks.search_response --limit 50
+"""
+import argparse
+import statistics
+import time
+import uuid
+from typing import List
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from app.api.routes import search
+
+
+WORDS = ("revenue growth quarter forecast margin segment customer pipeline "
+         "contract renewal churn expansion region product pricing").split()
+
+
+def synthetic_hits(count: int) -> List[dict]:
+    rng = np.random.default_rng(0)
+    hits = []
+    for i in range(count):
+        text = " ".join(rng.choice(WORDS, size=170))[:1000]
+        hits.append({
+            "chunk_id": str(uuid.uuid4()),
+            "score": float(1 - i / 100),
+            "text": text,
+            "pdf_key": f"{uuid.uuid4()}_annual-report.pdf",
+            "metadata": {
+                "start_page": i, "end_page": i + 1,
+                "document_sections": ["NarrativeText", "Title", "ListItem"],
+                "original_length": len(text),
+                "embedding_model": "sentence-transformers/all-MiniLM-L6-v2",
+                "embedding_dimension": 384
+            }
+        })
+    return hits
+
+
+class FakeStore:
+    model_name = None
+    hits: List[dict] = []
+
+    async def search(self, query_vector, pdf_key=None, limit=5, fields=None, **kwargs):
+        keep = None if fields is None else {"chunk_id", "score", *fields}
+        return [
+            {k: v for k, v in hit.items() if keep is None or k in keep}
+            for hit in self.hits[:limit]
+        ]
+
+
+class FakeEmbedder:
+    async def generate_query_embedding(self, query):
+        return np.zeros(384, dtype=np.float32)
+
+
+class OldSearchResult(BaseModel):
+    chunk_id: str
+    text: str
+    pdf_key: str
+    metadata: dict
+    score: float
+
+
+def build_app() -> FastAPI:
+    search.QdrantStore = FakeStore
+    search.create_embedding_generator = lambda model_name=None: FakeEmbedder()
+
+    app = FastAPI()
+    app.include_router(search.router)
+
+    # Previous behaviour: full payload validated through the response model
+    @app.post("/search-before", response_model=List[OldSearchResult])
+    async def search_before(query: search.SearchQuery):
+        return await FakeStore().search(None, limit=query.limit)
+
+    return app
+
+
+def measure(client, path, body, requests):
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = client.post(path, json=body)
+        timings.append(time.perf_counter() - start)
+        response.raise_for_status()
+    timings.sort()
+    return len(response.content), statistics.median(timings), timings[int(len(timings) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    FakeStore.hits = synthetic_hits(args.limit)
+    client = TestClient(build_app())
+    query = {"query": "revenue growth forecast", "limit": args.limit}
+
+    cases = [
+        ("before: full payload + validation", "/search-before", query),
+        ("after: full payload, orjson", "/search", query),
+        ("after: text+pdf_key, 200-char snippet", "/search",
+         {**query, "fields": ["text", "pdf_key"], "snippet_chars": 200}),
+        ("after: snippet + highlights", "/search",
+         {**query, "fields": ["text", "pdf_key"], "snippet_chars": 200, "highlight": True}),
+        ("after: ids and scores only", "/search", {**query, "fields": []}),
+    ]
+    for name, path, body in cases:
+        measure(client, path, body, 20)  # warm up
+        size, p50, p99 = measure(client, path, body, args.requests)
+        print(f"{name:<40} {size / 1024:7.1f} KiB   p50 {p50 * 1000:6.2f} ms   p99 {p99 * 1000:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()